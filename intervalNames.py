@@ -0,0 +1,52 @@
+from music21 import interval
+
+import functools
+import unittest
+
+# ------------------------------------------------------------------------------
+
+# Interval names from step counts, shared by moments.py and scoreSVs.py
+
+@functools.lru_cache(maxsize=4096)
+def intervalName(diatonicSteps, semitones):
+    '''
+    Returns the name of the interval spanning a given number of
+    diatonic steps and semitones (memoised: the set of distinct pairs in a corpus is small).
+    '''
+
+    generic = diatonicSteps + 1 if diatonicSteps >= 0 else diatonicSteps - 1
+    return interval.intervalFromGenericAndChromatic(generic, semitones).name
+
+
+def makeIntervalNameTable(maxSteps, maxSemitones):
+    '''
+    Returns a dict of interval names for every valid (diatonic steps, semitones) pair
+    up to maxSteps and maxSemitones either way.
+    Intended to be built once at import; intervalName covers anything wider.
+    '''
+
+    table = {}
+    for diatonicSteps in range(-maxSteps, maxSteps + 1):
+        for semitones in range(-maxSemitones, maxSemitones + 1):
+            try:
+                table[(diatonicSteps, semitones)] = intervalName.__wrapped__(diatonicSteps, semitones)
+            except interval.IntervalException:  # No such interval (e.g. 2 steps, 12 semitones)
+                pass
+    return table
+
+# ------------------------------------------------------------------------------
+
+class Test(unittest.TestCase):
+
+    def testIntervalNameTable(self):
+
+        table = makeIntervalNameTable(7, 12)
+        self.assertEqual(table[(2, 4)], 'M3')
+        self.assertEqual(table[(-4, -7)], 'P5')
+        self.assertNotIn((2, 12), table)
+        self.assertEqual(intervalName(9, 15), 'm10')
+
+# ------------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    unittest.main()
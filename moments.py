@@ -4,43 +4,108 @@ from music21 import common
 from music21 import corpus
 from music21 import converter
 from music21 import clef
-from music21 import interval
 from music21 import note
 from music21 import stream
 
+import copy
 import csv
+import functools
+import gzip
 import os
 import pickle
+import re
 import unittest
 
+from concurrent.futures import ProcessPoolExecutor
 from fractions import Fraction
+from operator import attrgetter
+from typing import NamedTuple
+
+from intervalNames import intervalName
+from intervalNames import makeIntervalNameTable
 
 # ------------------------------------------------------------------------------
 
+_INTERVAL_NAMES = makeIntervalNameTable(14, 24)  # Up to two octaves either way
+
+
 def getIntervalList(elementList):
     '''
     Given a list of notes (e.g. a segment from getSegmentsList),
     returns a list of intervals between adjacent notes.
+    Names come from _INTERVAL_NAMES, falling back on intervalName
+    for wider or microtonal intervals.
     '''
 
+    pitches = [(n.pitch.diatonicNoteNum, n.pitch.ps) for n in elementList]
+
     intervalList = []
 
-    for i in range(len(elementList)-1):
-        n1 = elementList[i]
-        n2 = elementList[i + 1]
-        intervalObj = interval.Interval(n1, n2)
-        intervalList.append(intervalObj.name)
+    for i in range(len(pitches)-1):
+        p1 = pitches[i]
+        p2 = pitches[i + 1]
+        key = (p2[0] - p1[0], p2[1] - p1[1])
+        name = _INTERVAL_NAMES.get(key)
+        if name is None:
+            name = intervalName(*key)
+        intervalList.append(name)
 
     return intervalList
 
+_FROZENSET_INTERN = {}
+
+
+def _internFrozenset(values):
+    '''
+    Returns a shared frozenset of the values so that equal sets across segments are
+    one object (and so pickled only once per file).
+    '''
+
+    fs = frozenset(values)
+    return _FROZENSET_INTERN.setdefault(fs, fs)
+
+
+_offset = attrgetter('offset')
+_offsetAndLength = attrgetter('offset', 'quarterLength')
+
+
+class SegmentInfo(NamedTuple):
+    '''
+    The data stored for each melodic segment (fields are None where not retrieved):
+
+    startingMeasure, startingOffset, endingMeasure, endingOffset:
+        where the segment starts and ends (offsets within the measure);
+    intervals, noteValues, metricalPositions:
+        frozensets of those used in the segment;
+    source:
+        the file the segment comes from, where known (e.g. from searchParquetCorpus).
+    '''
+
+    startingMeasure: int = None
+    startingOffset: float = None
+    endingMeasure: int = None
+    endingOffset: float = None
+    intervals: frozenset = None
+    noteValues: frozenset = None
+    metricalPositions: frozenset = None
+    source: str = None
+
+
+def _asSegmentInfos(data):
+    '''
+    Converts segments stored as dicts (as in older pickles, e.g. the LiederSegments folder) to SegmentInfo.
+    '''
+    return [SegmentInfo(**x) if isinstance(x, dict) else x for x in data]
+
+
 def getInfo(segmentList, startEnd=True, intervals=True, durations=True, metricalPositions=True):
     '''
     Given a list of notes (e.g. a segment from getSegmentsList),
-    returns starting/ending positions for the segment and
-    lists of intervals, durations, and metrical positions used (all optional).
+    returns a SegmentInfo with starting/ending positions for the segment and
+    frozensets of intervals, durations, and metrical positions used (all optional).
     '''
 
-    outInfo = []  # Macro list of dicts (one dict for each segment)
+    outInfo = []  # Macro list of SegmentInfos (one for each segment)
 
     for segment in segmentList:
         thisSegment = {}
@@ -53,15 +118,15 @@ def getInfo(segmentList, startEnd=True, intervals=True, durations=True, metrical
             thisSegment['endingOffset'] = lastNote.offset + lastNote.quarterLength
         if intervals==True:
             allIntervals = getIntervalList(segment)
-            thisSegment['intervals'] = set(allIntervals)
+            thisSegment['intervals'] = _internFrozenset(allIntervals)
+        if durations==True or metricalPositions==True:
+            positions, noteValues = zip(*map(_offsetAndLength, segment))  # One pass for both
         if durations==True:
-            noteValues = [x.quarterLength for x in segment]
-            thisSegment['noteValues'] = set(noteValues)
+            thisSegment['noteValues'] = _internFrozenset(noteValues)
         if metricalPositions==True:
-            positions = [x.offset for x in segment]
-            thisSegment['metricalPositions'] = set(positions)
+            thisSegment['metricalPositions'] = _internFrozenset(positions)
 
-        outInfo.append(thisSegment)
+        outInfo.append(SegmentInfo(**thisSegment))
 
     return outInfo
 
@@ -71,143 +136,311 @@ def getSegmentsOfType(data, measureAvoid=[100,110], offsetAvoid=[1000,2000],
     '''
     Given data of the type output by getInfo, retrieve cases matching specific requirements
     (avoiding specific measure ranges, intervals, etc.).
-    Returns a list of dicts with full data for relevant cases.
+    Every requirement given applies: a segment is kept only if it clears all of them.
+    Returns a list of SegmentInfos with full data for relevant cases.
     NB:
-    measureAvoid and offsetAvoid = [start, end], or None
+    measureAvoid and offsetAvoid = [start, end], or None (start inclusive, end exclusive)
     intvsToAvoid, noteValsToAvoid, and metricalPositionsToAvoid all lists (can be empty, '[]').
     '''
 
-    cases = []
-
-    for segment in data:
-
-        if measureAvoid:
-            if segment['startingMeasure'] in [x for x in range(measureAvoid[0], measureAvoid[1])]:
-                continue
-            elif segment['endingMeasure'] in [x for x in range(measureAvoid[0], measureAvoid[1])]:
-                continue
-            else:
-                cases.append(segment)
-
-        elif offsetAvoid:
-            if segment['startingOffset'] in [x for x in range(offsetAvoid[0], offsetAvoid[1])]:
-                continue
-            elif segment['endingOffset'] in [x for x in range(offsetAvoid[0], offsetAvoid[1])]:
-                continue
-            else:
-                cases.append(segment)
-
-        elif intvsToAvoid:
-            if any(intv in segment['intervals'] for intv in intvsToAvoid):
-                continue
-            else:
-                cases.append(segment)
+    # Build the tests for the requirements actually given, once, rather than per segment.
+    tests = []
+
+    if measureAvoid:
+        measureStart, measureEnd = measureAvoid
+        tests.append(lambda segment: not (measureStart <= segment.startingMeasure < measureEnd
+                                          or measureStart <= segment.endingMeasure < measureEnd))
+    if offsetAvoid:
+        offsetStart, offsetEnd = offsetAvoid
+        tests.append(lambda segment: not (offsetStart <= segment.startingOffset < offsetEnd
+                                          or offsetStart <= segment.endingOffset < offsetEnd))
+    if intvsToAvoid:
+        intvsToAvoid = frozenset(intvsToAvoid)
+        tests.append(lambda segment: intvsToAvoid.isdisjoint(segment.intervals))
+    if noteValsToAvoid:
+        noteValsToAvoid = frozenset(noteValsToAvoid)
+        tests.append(lambda segment: noteValsToAvoid.isdisjoint(segment.noteValues))
+    if metricalPositionsToAvoid:
+        metricalPositionsToAvoid = frozenset(metricalPositionsToAvoid)
+        tests.append(lambda segment: metricalPositionsToAvoid.isdisjoint(segment.metricalPositions))
+
+    return [segment for segment in data if all(test(segment) for test in tests)]
 
-        elif noteValsToAvoid:
-            if any(noteValue in segment['noteValues'] for noteValue in noteValsToAvoid):
-                continue
-            else:
-                cases.append(segment)
-
-        elif metricalPositionsToAvoid:
-            if any(metricalPosition in segment['metricalPositions'] for metricalPosition in metricalPositionsToAvoid):
-                continue
-            else:
-                cases.append(segment)
+# ------------------------------------------------------------------------------
 
-        else:
-            cases.append(segment)
+def _csvCell(value):
+    return '' if value is None else str(value)
 
-    return cases
+def _setCell(items):
+    '''
+    Formats one of the getInfo sets as a set literal, e.g. "{'M3', 'm3'}", or "set()" when empty,
+    as the sets were written before getInfo stored them as frozensets.
+    '''
+    if items is None:
+        return ''
+    return '{' + ', '.join(map(repr, items)) + '}' if items else 'set()'
 
-# ------------------------------------------------------------------------------
+def _csvRow(segment):
+    '''
+    Formats a SegmentInfo as a CSV line without going through csv.writer field by field:
+    the numeric columns never need quoting and the set columns (which contain commas
+    but never double quotes) always do.
+    Only the free-text source is escaped.
+    '''
+    source = segment.source
+    if source is not None:
+        source = '"' + source.replace('"', '""') + '"'
+    return '%s,%s,%s,%s,"%s","%s","%s",%s\r\n' % (_csvCell(segment.startingMeasure),
+                                                 _csvCell(segment.startingOffset),
+                                                 _csvCell(segment.endingMeasure),
+                                                 _csvCell(segment.endingOffset),
+                                                 _setCell(segment.intervals),
+                                                 _setCell(segment.noteValues),
+                                                 _setCell(segment.metricalPositions),
+                                                 _csvCell(source))
 
 def makeCSVFile(data, csvFilePath, csvFileName):
     '''
     Makes a CSV file for one work from an input score.
     '''
 
-    with open(csvFilePath+csvFileName, 'a') as csvfile:
+    with open(csvFilePath+csvFileName, 'a', newline='') as csvfile:
         csvOut = csv.writer(csvfile, delimiter=',',
                             quotechar='"', quoting=csv.QUOTE_MINIMAL)
 
-        csvOut.writerow([x for x in data[0].keys()])
+        csvOut.writerow(SegmentInfo._fields)
+        csvfile.writelines(_csvRow(segmentData) for segmentData in data)
+
+_SET_CELL_ITEM = re.compile(r"Fraction\([^)]*\)|'[^']*'|[^\s,'{}()]+")
 
-        for segmentData in data:
-            csvOut.writerow([x for x in segmentData.values()])
+def _parseSetCell(cell):
+    '''
+    Parses a CSV cell written from one of the getInfo sets
+    (e.g. "{'m3', 'P1'}", "{0.5, Fraction(1, 3)}", or "set()")
+    into a frozenset of the items as strings.
+    '''
+    start = cell.find('{')
+    if start == -1:  # Empty set
+        return frozenset()
+    items = _SET_CELL_ITEM.findall(cell, start, cell.rfind('}'))
+    return frozenset(x.strip("'") for x in items)
 
 def getSegmentsOfTypeCSV(csvFilePath, csvFileName,
                         intvsToAvoid=['m6', 'M6'], noteValsToAvoid=['0.25', '0.125']):
     '''
-    Given data of the type output by getInfo, retrieve cases matching specific requirements
+    Given a CSV file of the type output by makeCSVFile, retrieve cases matching specific requirements
     e.g. avoiding specific intervals.
-    Returns a dict with full data for relevant cases.
+    Each row's interval and note value cells are parsed once into sets for comparison.
+    Returns a list of the rows (lists of strings) for relevant cases.
     '''
 
+    intvsToAvoid = frozenset(intvsToAvoid)
+    noteValsToAvoid = frozenset(noteValsToAvoid)
+
     cases = []
 
-    f = open(csvFilePath+csvFileName)
-    next(f)
-    for row in csv.reader(f):
-        if any(intv in row[2] for intv in intvsToAvoid):
-            continue
-        elif any(noteValue in row[3] for noteValue in noteValsToAvoid):
-            continue
-        else:
-            cases.append(segment)
+    with open(csvFilePath+csvFileName, newline='') as f:
+        csvIn = csv.reader(f)
+        headers = next(csvIn)
+        intervalsIndex = headers.index('intervals')
+        noteValuesIndex = headers.index('noteValues')
+        for row in csvIn:
+            if not intvsToAvoid.isdisjoint(_parseSetCell(row[intervalsIndex])):
+                continue
+            if not noteValsToAvoid.isdisjoint(_parseSetCell(row[noteValuesIndex])):
+                continue
+            cases.append(row)
 
     return cases
 
 # ------------------------------------------------------------------------------
 
 def getFiles(path, extension=None):
-    fileList = []
-    for file in os.listdir(path):
-        if extension:
-            if file.endswith(extension):
-                fileList.append(file)
-        else:
-            fileList.append(file)
-    return fileList
+    '''
+    Returns the names of the files (not subdirectories) in path,
+    optionally only those ending with extension.
+    '''
+    with os.scandir(path) as entries:
+        return [entry.name for entry in entries
+                if entry.is_file() and (not extension or entry.name.endswith(extension))]
+
+_GZIP_MAGIC = b'\x1f\x8b'
 
 def storePickle(obj, path, filename):
+    '''
+    Pickles obj (highest protocol, gzip-compressed) to path + filename + '.p'.
+    '''
     filename = path + filename + '.p'
-    with open(filename, 'wb') as fileout:
-        pickle.dump(obj, fileout)
+    with gzip.open(filename, 'wb', compresslevel=3) as fileout:
+        pickle.dump(obj, fileout, protocol=pickle.HIGHEST_PROTOCOL)
     return filename
 
 def loadPickle(path, filename):
+    '''
+    Loads a pickle written by storePickle.
+    Uncompressed pickles (as in the LiederSegments folder) are also accepted.
+    '''
     filename = path + filename + '.p'
     with open(filename, 'rb') as filein:
+        if filein.read(2) == _GZIP_MAGIC:
+            filein.seek(0)
+            with gzip.open(filein, 'rb') as gzipin:
+                return pickle.load(gzipin)
+        filein.seek(0)
         obj = pickle.load(filein)
     return obj
 
 # ------------------------------------------------------------------------------
 
-def makeCorpus(fileList, fileSourcePath, fileDestinationPath, update=True):
+def _parseScore(filePath):
+    '''
+    Parses the score at filePath, reusing the parse of the last few scores (see _parseScoreVersion).
+    The cached score is shared: copy anything taken from it before modifying.
+    '''
+    return _parseScoreVersion(filePath, os.path.getmtime(filePath))
+
+@functools.lru_cache(maxsize=4)
+def _parseScoreVersion(filePath, modifiedTime):
+    '''
+    Caches parsed scores by path and modification time, so an edited file is parsed afresh.
+    Only a few are kept (renderExample tends to take several examples from one score in a row);
+    call _parseScoreVersion.cache_clear() to release them.
+    '''
+    return converter.parse(filePath)
+
+def _makeCorpusEntry(fileName, fileSourcePath, fileDestinationPath):
+    '''
+    Parses, segments, and pickles one file for makeCorpus.
+    Returns the fileName, or None if the file could not be parsed.
+    '''
+    try:
+        score = converter.parse(fileSourcePath+fileName)
+    except:
+        return None
+    topLine = score.parts[0]
+    segmented = segmentByRests.Segmenter.getSegmentsList(topLine)
+    data = getInfo(segmented)
+    storePickle(data, fileDestinationPath, fileName[:-4])
+    return fileName
+
+def makeCorpus(fileList, fileSourcePath, fileDestinationPath, update=True, maxWorkers=None):
+    '''
+    Runs _makeCorpusEntry on each file in fileList across a pool of processes
+    (maxWorkers, defaulting to the number of CPUs).
+    Each file's pickle is written as soon as it is done, so a failure does not lose earlier work.
+    '''
+    processOne = functools.partial(_makeCorpusEntry,
+                                   fileSourcePath=fileSourcePath,
+                                   fileDestinationPath=fileDestinationPath)
+    with ProcessPoolExecutor(max_workers=maxWorkers) as executor:
+        for fileName in executor.map(processOne, fileList, chunksize=4):
+            if fileName and update==True:
+                print(fileName)
+
+def _adviseWillNeed(directory, fileList):
+    '''
+    Asks the OS to start reading the files into the page cache
+    so that disk reads overlap with unpickling the files before them.
+    A no-op where posix_fadvise is unavailable (e.g. Windows, macOS).
+    '''
+    if not hasattr(os, 'posix_fadvise'):
+        return
     for fileName in fileList:
+        fd = os.open(directory + fileName, os.O_RDONLY)
         try:
-            score = converter.parse(fileSourcePath+fileName)
-        except:
-            continue
-        topLine = score.parts[0]
-        segmented = analysis.segmentByRests.Segmenter.getSegmentsList(topLine)
-        data = getInfo(segmented)
-        storePickle(data, fileDestinationPath, fileName[:-4])
-        if update==True:
-            print(fileName)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
 
 def searchCorpus(directory, updates=True):
-    corpusCases = []
-    fileList = getFiles(directory)
+    '''
+    Runs getSegmentsOfType on each pickle in directory,
+    yielding the matching segments file by file rather than collecting them all in memory.
+    Each segment's source is the file it came from unless already set (as in makeParquetCorpus).
+    Wrap in list() for the full set of cases.
+    '''
+    fileList = getFiles(directory, '.p')
+    _adviseWillNeed(directory, fileList)
     for fileName in fileList:
         if updates==True:
             print(fileName)
-        if fileName.endswith('.p'):
-            loadedData = loadPickle(directory, fileName[:-2])
-            thisCase = getSegmentsOfType(loadedData)
-            corpusCases.append([x for x in thisCase])
-    return corpusCases
+        source = fileName[:-2]
+        loadedData = loadPickle(directory, source)
+        for segment in getSegmentsOfType(_asSegmentInfos(loadedData)):
+            yield segment._replace(source=segment.source or source)
+
+# ------------------------------------------------------------------------------
+
+# Columnar alternative to the per-file pickles (requires pyarrow).
+# Quarter length values (offsets, note values, metrical positions) are stored as strings
+# (e.g. '0.5', '7/3') so that Fractions survive the round trip exactly.
+
+
+def _strToQl(qlString):
+    return common.opFrac(Fraction(qlString))
+
+def makeParquetCorpus(directory, parquetFilePath):
+    '''
+    Collects the pickles made by makeCorpus in directory into a single Parquet file,
+    one row per segment, with a 'source' column for the file the segment came from.
+    '''
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([('source', pa.string()),
+                        ('startingMeasure', pa.int64()),
+                        ('startingOffset', pa.string()),
+                        ('endingMeasure', pa.int64()),
+                        ('endingOffset', pa.string()),
+                        ('intervals', pa.list_(pa.string())),
+                        ('noteValues', pa.list_(pa.string())),
+                        ('metricalPositions', pa.list_(pa.string())),
+                        ])
+
+    rows = []
+    for fileName in getFiles(directory, '.p'):
+        for segment in _asSegmentInfos(loadPickle(directory, fileName[:-2])):
+            rows.append({'source': segment.source or fileName[:-2],
+                         'startingMeasure': segment.startingMeasure,
+                         'startingOffset': str(segment.startingOffset),
+                         'endingMeasure': segment.endingMeasure,
+                         'endingOffset': str(segment.endingOffset),
+                         'intervals': sorted(segment.intervals),
+                         'noteValues': [str(x) for x in segment.noteValues],
+                         'metricalPositions': [str(x) for x in segment.metricalPositions],
+                         })
+
+    pq.write_table(pa.Table.from_pylist(rows, schema=schema), parquetFilePath)
+    return parquetFilePath
+
+def searchParquetCorpus(parquetFilePath, measureAvoid=[100,110], **kwargs):
+    '''
+    As searchCorpus, but for the single Parquet file made by makeParquetCorpus.
+    The measureAvoid test is pushed down into the Parquet read;
+    the remaining requirements (kwargs) are passed on to getSegmentsOfType.
+    Returns a list of SegmentInfos as for getSegmentsOfType, with the source of each.
+    '''
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    rowFilter = None
+    if measureAvoid:
+        start, end = measureAvoid
+        for key in ('startingMeasure', 'endingMeasure'):
+            outside = (pc.field(key) < start) | (pc.field(key) >= end)
+            rowFilter = outside if rowFilter is None else rowFilter & outside
+
+    data = [SegmentInfo(startingMeasure=row['startingMeasure'],
+                        startingOffset=_strToQl(row['startingOffset']),
+                        endingMeasure=row['endingMeasure'],
+                        endingOffset=_strToQl(row['endingOffset']),
+                        intervals=_internFrozenset(row['intervals']),
+                        noteValues=_internFrozenset(_strToQl(x) for x in row['noteValues']),
+                        metricalPositions=_internFrozenset(_strToQl(x) for x in row['metricalPositions']),
+                        source=row['source'])
+            for row in pq.read_table(parquetFilePath, filters=rowFilter).to_pylist()]
+
+    return getSegmentsOfType(data, measureAvoid=None, **kwargs)
 
 # ------------------------------------------------------------------------------
 
@@ -217,15 +450,16 @@ def renderExample(segmentData, fileSourcePath, fileName):
     filing the incomplete starting and ending measures with rests as necessary with 'fillMeasures'.
     '''
 
-    score = converter.parse(fileSourcePath+fileName)
-    fragment = score.parts[0].measures(segmentData['startingMeasure'], segmentData['endingMeasure'])
+    score = _parseScore(fileSourcePath+fileName)
+    fragment = score.parts[0].measures(segmentData.startingMeasure, segmentData.endingMeasure)
+    fragment = copy.deepcopy(fragment)  # fillMeasures edits the measures, which belong to the cached score
     # TODO: make part choice settable (i.e. not just for lieder)
 
     filledFragment = fillMeasures(fragment,
-                                  firstMeasureRef=segmentData['startingMeasure'],
-                                  lastMeasureRef=segmentData['endingMeasure'],
-                                  startOffset=segmentData['startingOffset'],
-                                  endOffset=segmentData['endingOffset'])
+                                  firstMeasureRef=segmentData.startingMeasure,
+                                  lastMeasureRef=segmentData.endingMeasure,
+                                  startOffset=segmentData.startingOffset,
+                                  endOffset=segmentData.endingOffset)
 
     return filledFragment
 
@@ -239,22 +473,26 @@ def fillMeasures(fragment, firstMeasureRef=1, lastMeasureRef=-1, startOffset=1,
     lastMeasure = fragment.measure(lastMeasureRef)
     measureLength = firstMeasure.quarterLength
 
-    startRest = note.Rest()
-    startRest.quarterLength = startOffset
-    for x in firstMeasure.recurse().notesAndRests:
+    startRest = note.Rest(quarterLength=startOffset)
+    # Collect first, then remove (not while iterating over the measure).
+    # Sorted by offset so that the scan can stop at the boundary, even across voices.
+    toRemove = []
+    for x in sorted(firstMeasure.recurse().notesAndRests, key=_offset):
         if x.offset < startOffset:
-            fragment.remove(x, recurse=True)
+            toRemove.append(x)
         else:
-            continue  # Exit loop once reached the position after
+            break  # Exit loop once reached the position after
+    firstMeasure.remove(toRemove, recurse=True)
     firstMeasure.insert(0, startRest)
 
-    endRest = note.Rest()
-    endRest.quarterLength = measureLength - endOffset
-    for x in lastMeasure.recurse().notesAndRests[::-1]:
+    endRest = note.Rest(quarterLength=measureLength - endOffset)
+    toRemove = []
+    for x in sorted(lastMeasure.recurse().notesAndRests, key=_offset, reverse=True):
         if x.offset >= endOffset:
-            fragment.remove(x, recurse=True)
+            toRemove.append(x)
         else:
-            continue
+            break
+    lastMeasure.remove(toRemove, recurse=True)
     lastMeasure.insert(endOffset, endRest)
 
     return fragment
@@ -285,9 +523,9 @@ class Test(unittest.TestCase):
 
         oneInfoSet = info[0]
 
-        self.assertIsInstance(oneInfoSet, dict)
-        self.assertEqual(oneInfoSet['endingMeasure'], 10)
-        self.assertEqual(len(oneInfoSet['intervals']), 3)
+        self.assertIsInstance(oneInfoSet, SegmentInfo)
+        self.assertEqual(oneInfoSet.endingMeasure, 10)
+        self.assertEqual(len(oneInfoSet.intervals), 3)
 
     def testGetSegmentsOfType(self):
 
@@ -298,9 +536,9 @@ class Test(unittest.TestCase):
         oneInfoSet = filteredData[0]
 
         self.assertIsInstance(filteredData, list)
-        self.assertIsInstance(oneInfoSet, dict)
-        self.assertEqual(oneInfoSet['endingMeasure'], 10)
-        self.assertEqual(len(oneInfoSet['intervals']), 3)
+        self.assertIsInstance(oneInfoSet, SegmentInfo)
+        self.assertEqual(oneInfoSet.endingMeasure, 10)
+        self.assertEqual(len(oneInfoSet.intervals), 3)
 
     ## TODO: More tests:
 
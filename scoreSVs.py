@@ -36,22 +36,31 @@ TODO:
 
 '''
 
+from music21 import chord
 from music21 import common
 from music21 import pitch
-from music21 import interval
+from music21 import note
 from music21 import stream
 from music21 import converter
 
+from concurrent.futures import ProcessPoolExecutor
 from fractions import Fraction
-from collections import Counter
-from copy import deepcopy
-from itertools import combinations
+from functools import lru_cache
+from functools import partial
+from operator import attrgetter
+from copy import copy
 import numpy as np
-import matplotlib.pyplot as plt
 import csv
+import gzip
+import hashlib
 import os
+import re
+import sys
 import unittest
 
+from intervalNames import intervalName
+from intervalNames import makeIntervalNameTable
+
 
 # ------------------------------------------------------------------------------
 
@@ -78,6 +87,17 @@ class TableEntry(object):
         music theoretic representations of 'distinct' chord types.
     '''
 
+    __slots__ = ('uniqueOffsetID',
+                 'measure',
+                 'beat',
+                 'beatStrength',
+                 'length',
+                 'pitches',
+                 'intervals',
+                 'primeForm',
+                 'normalOrder',
+                 )
+
     def __init__(self):
         self.uniqueOffsetID = None
         self.measure = None
@@ -90,6 +110,18 @@ class TableEntry(object):
         self.normalOrder = None
 
 
+# The fields of a TableEntry in SV column order, as a tuple (for ScoreInfoSV.makeSV)
+_svRow = attrgetter('uniqueOffsetID',
+                    'measure',
+                    'beat',
+                    'beatStrength',
+                    'length',
+                    'pitches',
+                    'intervals',
+                    'primeForm',
+                    'normalOrder',
+                    )
+
 # ------------------------------------------------------------------------------
 
 class ScoreInfoSV:
@@ -97,13 +129,102 @@ class ScoreInfoSV:
     Retrieve chord and rest info from scores.
     Optionally: create a variant dataset with equal, repeated slice lengths
     Optionally: exporting to a separated values file.
+    Optionally: caching the extracted data for score paths in cacheDir (requires pyarrow),
+    so that re-runs on an unchanged score skip parsing and chordify.
     '''
 
-    def __init__(self, scoreOrPath):
+    def __init__(self, scoreOrPath, cacheDir=None):
 
         self.scoreOrPath = scoreOrPath
+        self.cacheDir = cacheDir
+
+        if self._readCache():
+            return
+
         self._getScore()
         self.extractData()
+        self._writeCache()
+
+    def _cachePath(self):
+        '''
+        Where the extracted data for a score path is cached (in cacheDir, if set).
+        Named by a hash of the path and its modification time so that edited scores are re-extracted.
+        Returns None if there is no cacheDir or the input is not a path.
+        '''
+
+        if not self.cacheDir or type(self.scoreOrPath) is not str:
+            return None
+
+        path = os.path.abspath(self.scoreOrPath)
+        key = hashlib.sha1(f'{path}{os.path.getmtime(path)}'.encode()).hexdigest()
+        return os.path.join(self.cacheDir, key + '.parquet')
+
+    def _readCache(self):
+        '''
+        Loads self.data (and the file name from the score metadata) from the cache, if available.
+        Returns True if it did, in which case the score itself is not parsed (self.score is None).
+        '''
+
+        cachePath = self._cachePath()
+        if not cachePath or not os.path.exists(cachePath):
+            return False
+
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(cachePath)
+        self.data = []
+        for row in table.to_pylist():
+            thisEntry = TableEntry()
+            for field, value in row.items():
+                setattr(thisEntry, field, value)
+            self.data.append(thisEntry)
+
+        self.score = None
+        self.svFileName = table.schema.metadata[b'svFileName'].decode()
+        return True
+
+    def _writeCache(self):
+        '''
+        Stores self.data in the cache (see _cachePath) for _readCache.
+        '''
+
+        cachePath = self._cachePath()
+        if not cachePath:
+            return
+
+        os.makedirs(self.cacheDir, exist_ok=True)
+        self.name()
+        self.makeParquet(*os.path.split(cachePath))
+
+    def makeParquet(self, parquetFilePath: str = '', parquetFileName: str = ''):
+        '''
+        Writes the data to a Parquet file: a compact, typed alternative to makeSV's
+        separated values (requires pyarrow).
+        The file name (as from self.name()) is kept in the file's metadata.
+        '''
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not parquetFileName:
+            self.name()
+            parquetFileName = self.svFileName + '.parquet'
+
+        schema = pa.schema([('uniqueOffsetID', pa.float64()),
+                            ('measure', pa.int64()),
+                            ('beat', pa.float64()),
+                            ('beatStrength', pa.float64()),
+                            ('length', pa.float64()),
+                            ('pitches', pa.list_(pa.string())),
+                            ('intervals', pa.list_(pa.string())),
+                            ('primeForm', pa.list_(pa.int64())),
+                            ('normalOrder', pa.list_(pa.int64())),
+                            ],
+                           metadata={'svFileName': getattr(self, 'svFileName', '')})
+
+        rows = [{field: getattr(entry, field) for field in TableEntry.__slots__} for entry in self.data]
+        table = pa.Table.from_pylist(rows, schema=schema)
+        pq.write_table(table, os.path.join(parquetFilePath, parquetFileName))
 
     def _getScore(self):
         '''
@@ -145,27 +266,25 @@ class ScoreInfoSV:
 
         chordScore = self.score.chordify()
         self.data = []
+        append = self.data.append  # Bound once for the loop below
 
-        for x in chordScore.recurse():
+        for x in chordScore.recurse().getElementsByClass((chord.Chord, note.Rest)):
+            # NB: Attributes in both and no 'notes' in chordify (only chords)
 
-            if ('Rest' in x.classes) or ('Chord' in x.classes):
-                # NB: Attributes in both and no 'notes' in chordify (only chords)
-
-                thisEntry = TableEntry()
+            thisEntry = TableEntry()
 
-                thisEntry.uniqueOffsetID = round(x.activeSite.offset + x.offset, 2)
-                thisEntry.measure = int(x.measureNumber)
-                thisEntry.beat = round(float(x.beat), 2)
-                thisEntry.beatStrength = x.beatStrength
-                thisEntry.length = round(float(x.quarterLength), 2)
+            thisEntry.uniqueOffsetID = round(x.activeSite.offset + x.offset, 2)
+            thisEntry.measure = int(x.measureNumber)
+            thisEntry.beat = round(float(x.beat), 2)
+            thisEntry.beatStrength = x.beatStrength
+            thisEntry.length = round(float(x.quarterLength), 2)
 
-                if 'Chord' in x.classes:  # Attributes in chord, but not rest
-                    thisEntry.pitches = list(dict.fromkeys([p.nameWithOctave for p in x.pitches]))
-                    thisEntry.intervals = getIntervals(x)
-                    thisEntry.primeForm = x.primeForm
-                    thisEntry.normalOrder = x.normalOrder
+            if isinstance(x, chord.Chord):  # Attributes in chord, but not rest
+                thisEntry.pitches = dedup(p.nameWithOctave for p in x.pitches)
+                thisEntry.intervals = getIntervals(x)
+                thisEntry.primeForm, thisEntry.normalOrder = getSetClass(x)
 
-                self.data.append(thisEntry)
+            append(thisEntry)
 
 
     def name(self):
@@ -173,6 +292,9 @@ class ScoreInfoSV:
         Names the sv file based on any available metadata.
         '''
 
+        if self.score is None:  # Read from the cache, which stores svFileName
+            return
+
         self.svFileName = ''
 
         metadata = [x[1] for x in self.score.metadata.all()]  # Values
@@ -190,9 +312,11 @@ class ScoreInfoSV:
                svFilePath: str = '',
                svFileName: str = '',
                delimiter='\t',
-               headers: bool = False):
+               headers: bool = False,
+               compress: bool = False):
         '''
         Writes the separated values file (TSV by default).
+        If compress==True, the file is gzipped (e.g. '.tsv.gz'); SVInfo reads either.
         '''
 
         if not svFilePath:
@@ -213,7 +337,12 @@ class ScoreInfoSV:
         else:
             self.name()
 
-        with open(f'{svFilePath}{self.svFileName}{extn}', 'w') as svfile:
+        if compress:
+            svfile = gzip.open(f'{svFilePath}{self.svFileName}{extn}.gz', 'wt', compresslevel=1, newline='')
+        else:
+            svfile = open(f'{svFilePath}{self.svFileName}{extn}', 'w', newline='', buffering=1 << 20)
+
+        with svfile:
             svOut = csv.writer(svfile, delimiter=delimiter,
                                 quotechar='"', quoting=csv.QUOTE_MINIMAL)
 
@@ -230,24 +359,102 @@ class ScoreInfoSV:
                             ]
                 svOut.writerow(headers)
 
-            for entry in self.data:
-                svOut.writerow([entry.uniqueOffsetID,
-                                entry.measure,
-                                entry.beat,
-                                entry.beatStrength,
-                                entry.length,
-                                entry.pitches,
-                                entry.intervals,
-                                entry.primeForm,
-                                entry.normalOrder,
-                                ])
+            svOut.writerows(map(_svRow, self.data))
+
+
+# Prime form of each triad type, as options for SVInfo.compareAllPrimes
+_TRIAD_PRIMES = {'major': '[0, 4, 7]',
+                 'minor': '[0, 3, 7]',
+                 'diminished': '[0, 3, 6]',
+                 'augmented': '[0, 4, 8]',
+                 }
+
+# ------------------------------------------------------------------------------
+
+# Scanning kernels for SVInfo queries.
+# Each finds the matching entries and the sum of their weights in one pass:
+# the entries' lengths for a weighted count, or ones for a plain count,
+# so that the choice is made once per query rather than per entry.
+# The NumPy versions are used by default.
+# Setting the environment variable SVINFO_NUMBA (e.g. SVINFO_NUMBA=1) compiles the loops with numba instead,
+# if it is installed: that only pays off on very long files,
+# since importing and compiling costs far more than a NumPy query on a typical SV file.
+
+def _matchCodeLoop(codes, target, weights):
+    mask = np.zeros(codes.size, dtype=np.bool_)
+    count = 0.0
+    for i in range(codes.size):
+        if codes[i] == target:
+            mask[i] = True
+            count += weights[i]
+    return mask, count
+
+
+def _matchBitsLoop(bitRows, query, weights):
+    mask = np.zeros(bitRows.shape[0], dtype=np.bool_)
+    count = 0.0
+    for i in range(bitRows.shape[0]):
+        for word in range(bitRows.shape[1]):
+            if bitRows[i, word] & query[word]:
+                mask[i] = True
+                count += weights[i]
+                break
+    return mask, count
+
+
+def _sumInOrder(values):
+    '''
+    Adds up the values one after another, as the loops above do,
+    so that both kernels round alike (ndarray.sum adds pairwise, which can differ in the last place).
+    '''
+
+    return float(np.cumsum(values)[-1]) if values.size else 0.0
+
+
+def _matchCodeNumPy(codes, target, weights):
+    mask = codes == target
+    return mask, _sumInOrder(weights[mask])
+
+
+def _matchBitsNumPy(bitRows, query, weights):
+    mask = (bitRows & query).any(axis=1)
+    return mask, _sumInOrder(weights[mask])
+
+
+@lru_cache(maxsize=None)
+def _kernels():
+    '''
+    Returns the (code, bits) kernel pair, chosen on first use (see above).
+    numba is only imported here, and only when asked for.
+    '''
+
+    if os.environ.get('SVINFO_NUMBA'):
+        try:
+            import numba
+        except ImportError:
+            pass
+        else:
+            return numba.njit(_matchCodeLoop), numba.njit(_matchBitsLoop)
+    return _matchCodeNumPy, _matchBitsNumPy
+
+
+def _matchCode(codes, target, weights):
+    return _kernels()[0](codes, target, weights)
+
 
+def _matchBits(bitRows, query, weights):
+    return _kernels()[1](bitRows, query, weights)
 
 # ------------------------------------------------------------------------------
 
 class SVInfo:
     '''
     For retrieving musical information from the SV files created by ScoreInfoSV.
+
+    The data is held column by column (one NumPy array or list per field, e.g. self.measures, self.lengths)
+    so that the queries below work on whole columns at once.
+    The prime forms and normal orders (self.primes, self.normals) are plain lists of strings.
+    self.data provides the same information as a list of TableEntry objects.
     '''
 
 
@@ -256,63 +463,163 @@ class SVInfo:
         self.svPathFullPath = svPath
         self.inPath, self.fileName = os.path.split(svPath)
 
+        self._data = None
+        self._pairs = None
         self.parseSV()
-        self.getPrimes()
-        self.getNormals()
 
     def parseSV(self):
         '''
-        Parses an SV file.
+        Parses an SV file (gzipped if the name ends in '.gz').
+        Rows are split on tabs and each column is then converted in one pass.
+        Accepts files with or without the leading offset column
+        (as written by makeSV and in the LiederScoreSVs folder respectively)
+        and with or without headers.
         '''
 
-        f = open(self.svPathFullPath, 'r')
+        opener = gzip.open if self.svPathFullPath.endswith('.gz') else open
+        with opener(self.svPathFullPath, 'rt', newline='') as f:
+            text = f.read()
 
-        self.data = []
+        if '"' in text:  # Quoted cells: leave it to the csv module
+            rows = [row for row in csv.reader(text.splitlines(), delimiter='\t') if row]
+        else:
+            rows = [line.split('\t') for line in text.splitlines() if line]
 
-        for row_num, line in enumerate(f):
-            values = line.split('\t')
-            thisEntry = TableEntry()
-            thisEntry.uniqueOffsetID = float(values[0])
-            thisEntry.measure = int(values[1])
-            thisEntry.beat = strToFloat(values[2])
-            thisEntry.beatStrength = float(values[3])  # Shouldn't need strToFloat
-            thisEntry.length = strToFloat(values[4])
-            thisEntry.pitches = values[5][2:-2].split('\', \'')
-            thisEntry.intervals = values[6][2:-2].split('\', \'')
-            thisEntry.primeForm = values[7]  # TODO: leave as is?
-            thisEntry.normalOrder = values[8][:-1]
+        if rows and rows[0][0] in ('Offset', 'Measure'):  # Headers
+            rows = rows[1:]
 
-            self.data.append(thisEntry)
+        n = len(rows)
+
+        if rows and len(rows[0]) == 9:
+            offsets, *columns = zip(*rows)
+            self.uniqueOffsetIDs = np.fromiter(map(float, offsets), dtype=float, count=n)
+        else:
+            columns = zip(*rows) if rows else [()] * 8
+            self.uniqueOffsetIDs = None
+
+        measures, beats, beatStrengths, lengths, pitches, intervals, primeForms, normalOrders = columns
+
+        self.measures = np.fromiter(map(int, measures), dtype=np.int32, count=n)  # Measure numbers are small
+        self.beats = strsToFloats(beats)
+        self.beatStrengths = np.fromiter(map(float, beatStrengths), dtype=float, count=n)  # Shouldn't need strToFloat
+        self.lengths = strsToFloats(lengths)
+        self.unitWeights = np.ones(n)  # For unweighted counts (see _weights)
+        distinctPitches, pitchIds = _listColumn(pitches)
+        self.pitchLists = [list(distinctPitches[i]) for i in pitchIds.tolist()]
+        distinctIntervals, intervalIds = _listColumn(intervals)
+        self.intervalLists = [list(distinctIntervals[i]) for i in intervalIds.tolist()]
+        self.primes = list(primeForms)  # TODO: leave as is?
+        self.normals = list(normalOrders)
+
+        # Each distinct prime form also gets a small integer code
+        # (self.primeVocab maps prime form to code, self.primeCodes has one code per entry)
+        # so that comparisons and counts work on integers rather than strings.
+        uniquePrimes, self.primeCodes = np.unique(np.array(self.primes, dtype=str), return_inverse=True)
+        self.uniquePrimes = uniquePrimes.tolist()
+        self.primeVocab = {prime: code for code, prime in enumerate(self.uniquePrimes)}
+        # How many entries have each prime; code -1 (a prime absent from this file) reads the trailing 0
+        self.primeCounts = np.bincount(self.primeCodes, minlength=len(self.uniquePrimes) + 1)
+
+        self._maskIntervals(distinctIntervals, intervalIds)
+
+    def _maskIntervals(self, distinctIntervals, intervalIds):
+        '''
+        Codes each distinct interval name as an integer (self.intervalVocab)
+        and records which intervals each entry has as a row of bits in self.intervalMask
+        (one uint64 word per 64 interval names),
+        so that intervalsOfType can test every entry at once.
+        Rows are made once per distinct interval list (from _listColumn) and then copied to each entry.
+        '''
 
-        f.close()
+        self.intervalVocab = {}
+        codes = np.fromiter((self.intervalVocab.setdefault(name, len(self.intervalVocab))
+                             for intervalList in distinctIntervals for name in intervalList),
+                            dtype=np.int64)
+        rows = np.repeat(np.arange(len(distinctIntervals)), [len(x) for x in distinctIntervals])
 
+        numWords = max(1, -(-len(self.intervalVocab) // 64))
+        distinctMask = np.zeros((len(distinctIntervals), numWords), dtype=np.uint64)
+        bits = np.left_shift(np.uint64(1), (codes % 64).astype(np.uint64))
+        np.bitwise_or.at(distinctMask, (rows, codes // 64), bits)
+        self.intervalMask = distinctMask[intervalIds]
 
-    def setsOfType(self, chordType='[0, 4, 8]', weighted=False, measures=True):
+    @property
+    def data(self):
         '''
-        Gets all cases of a specific chord type (expressed as a PC Set) and
-        returns a count (integer) of the number of occurences, or
-        if weighted==True, then that usage weighted by the quarterLength of those occurences.
-        If measures==True, also returns the list of measure locations.
+        The entries as a list of TableEntry objects (built from the columns on first use).
+        '''
+
+        if self._data is None:
+            if self.uniqueOffsetIDs is None:
+                offsets = [None] * len(self.measures)
+            else:
+                offsets = self.uniqueOffsetIDs.tolist()
+
+            self._data = []
+            for values in zip(offsets,
+                              self.measures.tolist(),
+                              self.beats.tolist(),
+                              self.beatStrengths.tolist(),
+                              self.lengths.tolist(),
+                              self.pitchLists,
+                              self.intervalLists,
+                              self.primes,
+                              self.normals):
+                thisEntry = TableEntry()
+                (thisEntry.uniqueOffsetID,
+                 thisEntry.measure,
+                 thisEntry.beat,
+                 thisEntry.beatStrength,
+                 thisEntry.length,
+                 thisEntry.pitches,
+                 thisEntry.intervals,
+                 thisEntry.primeForm,
+                 thisEntry.normalOrder) = values
+                self._data.append(thisEntry)
+
+        return self._data
+
+
+    def _weights(self, weighted):
+        '''
+        Per-entry weights for the query kernels: lengths if weighted==True, otherwise ones.
         '''
 
-        count = 0
-        msrs = []
+        if weighted == True:
+            return self.lengths
+        return self.unitWeights
 
-        for entry in self.data:
-            if entry.primeForm == chordType:
-                if measures == True:
-                    msrs.append(entry.measure)
-                if weighted == True:
-                    count += entry.length
-                else:
-                    count += 1
+    def _countAndMeasures(self, mask, count, weighted, measures):
+        '''
+        Shared by setsOfType and intervalsOfType:
+        formats the count (or weighted count) of the entries selected by a boolean mask and
+        optionally returns their measures.
+        '''
+
+        if weighted == True:
+            count = float(count)
+        else:
+            count = int(count)
 
         if measures == True:
-            return round(count, 3), msrs
+            return round(count, 3), self.measures[mask].tolist()
         else:
             return round(count, 3)
 
 
+    def setsOfType(self, chordType='[0, 4, 8]', weighted=False, measures=True):
+        '''
+        Gets all cases of a specific chord type (expressed as a PC Set) and
+        returns a count (integer) of the number of occurences, or
+        if weighted==True, then that usage weighted by the quarterLength of those occurences.
+        If measures==True, also returns the list of measure locations.
+        '''
+
+        code = self.primeVocab.get(chordType, -1)
+        mask, count = _matchCode(self.primeCodes, code, self._weights(weighted))
+        return self._countAndMeasures(mask, count, weighted, measures)
+
+
     def intervalsOfType(self, intervals=['A6', 'd3', 'A13', 'd10'], weighted=True, measures=True):
         '''
         Gets all entries including at least one of the given interval(s) and
@@ -323,38 +630,40 @@ class SVInfo:
         (Can't be included in setsOfType as it requires enharmonic information.)
         '''
 
-        count = 0
-        msrs = []
-        for entry in self.data:
-            intersection = [i for i in intervals if i in entry.intervals]
-            if intersection:  # I.e. if there is any intersection
-                if measures == True:
-                    msrs.append(entry.measure)
-                if weighted == True:
-                    count += entry.length
-                else:
-                    count += 1
+        if isinstance(intervals, str):  # A single interval name, not a sequence of characters
+            intervals = [intervals]
 
+        query = np.zeros(self.intervalMask.shape[1], dtype=np.uint64)
+        for name in frozenset(intervals):
+            code = self.intervalVocab.get(name)
+            if code is not None:
+                query[code // 64] |= np.uint64(1) << np.uint64(code % 64)
+        mask, count = _matchBits(self.intervalMask, query, self._weights(weighted))
+
+        result = self._countAndMeasures(mask, count, weighted, measures)
         if measures == True:
-            return round(count, 3), list(dict.fromkeys(msrs))
+            count, msrs = result
+            return count, dedup(msrs)
         else:
-            return round(count, 3)
+            return result
 
 
     def getPrimes(self):
         '''
         Retrieves all prime forms in a file for subsequent comparisons.
+        These are set by parseSV (self.primes); kept for compatibility.
         '''
 
-        self.primes = [entry.primeForm for entry in self.data]
+        return self.primes
 
 
     def getNormals(self):
         '''
         Retrieves all normal orders in a file for subsequent comparisons.
+        These are set by parseSV (self.normals); kept for compatibility.
         '''
 
-        self.normals = [entry.normalOrder for entry in self.data]
+        return self.normals
 
 
     def compareAllPrimes(self,
@@ -371,27 +680,24 @@ class SVInfo:
 
         total = len(self.primes)
 
-        hitList = []
-        if 'major' in triadsOfInterest:
-            hitList.append('[0, 4, 7]')
-        if 'minor' in triadsOfInterest:
-            hitList.append('[0, 3, 7]')
-        if 'diminished' in triadsOfInterest:
-            hitList.append('[0, 3, 6]')
-        if 'augmented' in triadsOfInterest:
-            hitList.append('[0, 4, 8]')
-        if 'triads' in triadsOfInterest:
-            hitList.append('[0, 4, 7]', '[0, 3, 7]', '[0, 3, 6]', '[0, 4, 8]')
-            # TODO: generalise wider than triads; accept any prime?
-        if hitList == []:
-            optionsList = ['major', 'minor', 'diminished', 'augmented', 'triads']
-            raise ValueError(f'Please chose one or more triad types: {optionsList}')
+        if isinstance(triadsOfInterest, str):  # A single option, e.g. ('diminished') without the comma
+            triadsOfInterest = (triadsOfInterest,)
+
+        optionsList = list(_TRIAD_PRIMES) + ['triads']
+        if not triadsOfInterest or any(triad not in optionsList for triad in triadsOfInterest):
+            raise ValueError(f'Please choose one or more triad types: {optionsList}')
+
+        allTriads = 'triads' in triadsOfInterest
+        hitList = [prime for triad, prime in _TRIAD_PRIMES.items() if allTriads or triad in triadsOfInterest]
+        # TODO: generalise wider than triads; accept any prime?
+
+        hitCodes = [self.primeVocab.get(triad, -1) for triad in hitList]
+        hitCounts = self.primeCounts[hitCodes].tolist()
 
         if Counts:
             currentTuple = ('Overall', total)
             overallInfo.append(currentTuple)
-        for triad in hitList:
-            currentCount = self.primes.count(triad)
+        for triad, currentCount in zip(hitList, hitCounts):
             if Counts:
                 currentName = triad + ' Count'
                 currentTuple = (currentName, currentCount)
@@ -404,6 +710,20 @@ class SVInfo:
         return overallInfo
 
 
+    def _chordPairs(self):
+        '''
+        Counts every pair of consecutive prime forms in one pass (built on first use, then kept)
+        for followChord. Returns arrays of the first and second prime codes of each distinct pair,
+        the position where that pair first occurs, and its count.
+        '''
+
+        if self._pairs is None:
+            numPrimes = len(self.uniquePrimes)
+            pairs = self.primeCodes[:-1] * numPrimes + self.primeCodes[1:]
+            pairCodes, firstIndices, counts = np.unique(pairs, return_index=True, return_counts=True)
+            self._pairs = (pairCodes // numPrimes, pairCodes % numPrimes, firstIndices, counts)
+        return self._pairs
+
     def followChord(self,
                     targetChord = '[0, 4, 8]',
                     howMany=15,
@@ -412,17 +732,17 @@ class SVInfo:
         Get data for the chords which follow an input target chord of interest.
         '''
 
-        # Get position info for targetChord
-        positions = []
-        for i in [i for i,x in enumerate(self.primes) if x == targetChord]:
-            positions.append(i)
-
-        # Retrieve following chord
-        following = []
-        for p in positions:
-            following.append(self.primes[p + 1])
+        # Select the chord pairs starting with targetChord
+        code = self.primeVocab.get(targetChord, -1)
+        firsts, seconds, firstIndices, counts = self._chordPairs()
+        hits = firsts == code
+        seconds, firstIndices, counts = seconds[hits], firstIndices[hits], counts[hits]
 
-        fullCount = Counter(following)
+        # Count each following chord type.
+        # Most common first, with ties in order of first appearance (as for Counter.most_common).
+        order = np.lexsort((firstIndices, -counts))
+        fullCount = list(zip([self.uniquePrimes[c] for c in seconds[order].tolist()],
+                             counts[order].tolist()))
 
         if ignoreFirst==True:
             start=1
@@ -430,9 +750,9 @@ class SVInfo:
             start=0
 
         if len(fullCount) > howMany:
-            self.followCount = fullCount.most_common()[start:howMany]
+            self.followCount = fullCount[start:howMany]
         else:
-            self.followCount = fullCount.most_common()[start:]
+            self.followCount = fullCount[start:]
 
     def followCountHistogram(self, outPath=None, fileName=None):
         '''
@@ -442,23 +762,31 @@ class SVInfo:
         by self.followChord().
         '''
 
+        # Only needed here, so not imported with the module.
+        # A standalone figure drawn with Agg leaves pyplot and the caller's backend untouched.
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
         labels, values = zip(*self.followCount)
         indexes = np.arange(len(labels))
         width = 0.5
 
-        plt.bar(indexes, values, width)
-        plt.title("Chord usage",fontsize=16)
-        plt.xlabel("Chord type", fontsize=12)
-        plt.ylabel("Count", fontsize=12)
-        plt.xticks(indexes + width*0.5, labels, rotation=90)
-        plt.xticks(indexes, labels, rotation=90)
-        plt.gcf().subplots_adjust(bottom=0.25)
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        ax.bar(indexes, values, width)
+        ax.set_title("Chord usage", fontsize=16)
+        ax.set_xlabel("Chord type", fontsize=12)
+        ax.set_ylabel("Count", fontsize=12)
+        ax.set_xticks(indexes)
+        ax.set_xticklabels(labels, rotation=90)
+        fig.subplots_adjust(bottom=0.25)
 
         if not outPath:
             outPath = self.inPath
         if not fileName:
             fileName = self.fileName
-        plt.savefig(f'{outPath + fileName}.png', facecolor='w', edgecolor='w', format='png')
+        fig.savefig(f'{outPath + fileName}.png', facecolor='w', edgecolor='w', format='png')
 
     def evenSlices(self, sliceWidth='auto'):
         '''
@@ -474,9 +802,9 @@ class SVInfo:
         sliceWidthOptions = [0.625, 0.125, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 4.0]
 
         if sliceWidth == 'auto':
-            lengths = [entry.length for entry in self.data]
-            if min(lengths) in sliceWidthOptions:
-                sliceWidth = min(lengths)
+            minLength = float(self.lengths.min())
+            if minLength in sliceWidthOptions:
+                sliceWidth = minLength
             else:
                 raise ValueError(f'Cannot work with the min slice width here ({sliceWidth}). '  +
                                     f'Please choose manually one from of {sliceWidthOptions}.')
@@ -487,9 +815,16 @@ class SVInfo:
                     raise ValueError(f'Cannot work with the slice width here {sliceWidth}. '  +
                                     f'Please choose manually one from of {sliceWidthOptions}.')
 
-        for index in range(len(self.data)):
+        data = self.data
+        ends = np.cumsum(self.lengths)  # Offset at the end of each entry, measured from the first
+        # Lengths are stored to 2 decimal places (e.g. a triplet eighth as 0.33, so three make 0.99),
+        # and summing them adds float error: a slice counts as full within this much of its end.
+        tolerance = 0.01
 
-            entry = self.data[index]
+        index = 0
+        while index < len(data):
+
+            entry = data[index]
 
             if entry.length > sliceWidth:
                 multiplier = int(entry.length / sliceWidth)
@@ -498,13 +833,12 @@ class SVInfo:
             elif entry.length == sliceWidth:
                 self.evenSliceList.append(entry)
             elif entry.length < sliceWidth:
-                self.evenSliceList.append(entry)  # Put it in, ignore following
-                count = entry.length
-                while count < sliceWidth:
-                    for entry in self.data[index:]:
-                        count += entry.length
-                        index += 1
-                        # TODO: doesn't deal with syncopation
+                self.evenSliceList.append(entry)  # Put it in, ignore following until the slice is full
+                sliceEnd = ends[index] - entry.length + sliceWidth
+                index = int(np.searchsorted(ends, sliceEnd - tolerance))  # First entry reaching the end of the slice
+                # TODO: doesn't deal with syncopation
+
+            index += 1
 
     def writeEvenMIDI(self, outPath=None, fileName=None):
         '''
@@ -518,46 +852,128 @@ class SVInfo:
         if not outPath:
             outPath = self.inPath
         if not fileName:
-            fileName = self.fileName[:-4]
+            fileName = self.fileName
+            if fileName.endswith('.gz'):
+                fileName = fileName[:-3]
+            fileName = fileName[:-4]
         fileName = fileName.replace('.', '')
         fileName = fileName.replace(' ', '_')
 
-        text_out = open(outPath + fileName + '.txt', "w")
-
-        for x in self.evenSliceList:
-            if x.pitches != ['']:  # Shouldn't need this. Always an empty entry, even if cutting the last one out.
-                ptchs = [pitch.Pitch(p) for p in x.pitches]
-                text_out.write(' '.join([str(p.midi) for p in ptchs]) + '\n')
-
-        text_out.close()
+        with open(outPath + fileName + '.txt', "w") as text_out:
+            text_out.writelines(' '.join([_midiNumberStr(p) for p in x.pitches]) + '\n'
+                                for x in self.evenSliceList
+                                if x.pitches)  # Rests have no pitches
 
 
 # ------------------------------------------------------------------------------
 
 # Static functions
 
+_INTERVAL_NAMES = makeIntervalNameTable(21, 36)  # Up to three octaves either way: chords span wider than melodic intervals
+
+
 def getIntervals(aChord):
     '''
     Return a list of interval names (strings) from a music21 chord.
+    Memoised on the chord's spelling and octaves (see _intervalsFor),
+    as the same sonorities recur throughout a piece.
     '''
 
+    key = tuple((p.diatonicNoteNum, p.ps) for p in aChord.pitches)
+    return list(_intervalsFor(key))
+
+
+@lru_cache(maxsize=None)
+def _intervalsFor(pitchSteps):
+    '''
+    Returns the interval names for a chord given as (diatonicNoteNum, ps) per pitch.
+    All pairs of pitches are measured at once from their diatonic and chromatic step numbers
+    and named from a precomputed table (no Interval objects except for outliers).
+    '''
+
+    diatonicNums = np.array([d for d, ps in pitchSteps], dtype=int)
+    pitchSpaces = np.array([ps for d, ps in pitchSteps], dtype=float)
+
+    lower, upper = np.triu_indices(len(pitchSpaces), 1)  # Same pairs and order as combinations()
+    steps = (diatonicNums[upper] - diatonicNums[lower]).tolist()
+    semitones = (pitchSpaces[upper] - pitchSpaces[lower]).tolist()
+
     intervals = []
-    pairs = combinations(aChord, 2)
-    for pair in pairs:
-        intv = interval.Interval(pair[0], pair[1])
-        intervals.append(intv.name)
+    for key in zip(steps, semitones):
+        name = _INTERVAL_NAMES.get(key)
+        if name is None:
+            name = intervalName(*key)
+        intervals.append(name)
+
+    return tuple(dedup(intervals))
+
 
-    return list(dict.fromkeys(intervals))
+def getSetClass(aChord):
+    '''
+    Return the prime form and normal order (lists of integers) of a music21 chord.
+    Both depend only on the chord's pitch classes, so they are memoised on those (see _setClassFor).
+    '''
+
+    primeForm, normalOrder = _setClassFor(tuple(sorted(set(aChord.pitchClasses))))
+    return list(primeForm), list(normalOrder)
+
+
+@lru_cache(maxsize=None)
+def _setClassFor(pitchClasses):
+    '''
+    Returns the prime form and normal order for a sorted tuple of pitch classes.
+    '''
+
+    aChord = chord.Chord(list(pitchClasses))
+    return tuple(aChord.primeForm), tuple(aChord.normalOrder)
+
+
+def dedup(items):
+    '''
+    Return a list of the items without repeats, keeping the first occurrence of each in order.
+    '''
+
+    seen = set()
+    return [x for x in items if not (x in seen or seen.add(x))]
+
+
+@lru_cache(maxsize=None)
+def _midiNumberStr(pitchName):
+    '''
+    Returns the MIDI note number of a pitch name (e.g. 'C#4' -> '61') as a string for writeEvenMIDI.
+    Each spelling is parsed by music21 once.
+    '''
+
+    return str(pitch.Pitch(pitchName).midi)
 
 
 def split(entry, n):
     '''
     Split an entry into n shorter ones of 1/nth the length.
+    Each is a separate object, so changing one slice does not change the others.
     '''
 
-    shorterEntry = deepcopy(entry)
+    shorterEntry = copy(entry)  # Fields are numbers, strings, and lists that are never edited in place
     shorterEntry.length /= n
-    return [shorterEntry] * n
+    return [copy(shorterEntry) for _ in range(n)]
+
+
+_LIST_ITEMS = re.compile(r"'([^']*)'")  # Items of a stringified list, e.g. "['C4', 'E4']" -> C4, E4; "" -> none
+
+
+def _listColumn(cells):
+    '''
+    Parses a column of stringified lists (see _LIST_ITEMS) once per distinct cell.
+    Returns the distinct cells' items as tuples of interned strings (in order of first appearance),
+    so that each distinct pitch or interval name is held once however many entries use it,
+    and an array giving the index of each entry's cell in that list.
+    '''
+
+    cellIndex = {}
+    ids = np.fromiter((cellIndex.setdefault(cell, len(cellIndex)) for cell in cells),
+                      dtype=np.intp, count=len(cells))
+    distinct = [tuple(map(sys.intern, _LIST_ITEMS.findall(cell))) for cell in cellIndex]
+    return distinct, ids
 
 
 def strToFloat(inString):
@@ -571,6 +987,47 @@ def strToFloat(inString):
     else:
         return float(inString)
 
+
+def strsToFloats(inStrings):
+    '''
+    strToFloat for a whole column.
+    Beat and length columns repeat a handful of values,
+    so each distinct string is parsed once and the column is filled from that lookup.
+    '''
+
+    values = {x: strToFloat(x) for x in set(inStrings)}
+    return np.fromiter(map(values.__getitem__, inStrings), dtype=float, count=len(inStrings))
+
+# ------------------------------------------------------------------------------
+
+# Corpus-scale extraction
+
+def _extractOne(scorePath, svFilePath, delimiter='\t', cacheDir=None, compress=False):
+    '''
+    Runs ScoreInfoSV on one score and writes its SV file to svFilePath,
+    named after the score file (e.g. 'bwv269.mxl' -> 'bwv269.tsv').
+    '''
+
+    svFileName = os.path.splitext(os.path.basename(scorePath))[0]
+    ScoreInfoSV(scorePath, cacheDir=cacheDir).makeSV(svFilePath, svFileName,
+                                                     delimiter=delimiter, compress=compress)
+    return svFileName
+
+
+def batchExtract(scorePaths, svFilePath, delimiter='\t', cacheDir=None, maxWorkers=None, compress=False):
+    '''
+    Makes SV files for many scores (e.g. all the Bach chorales),
+    processing them in parallel across maxWorkers processes (default: the number of CPUs).
+    Each score is independent and its SV file is written as soon as it is done
+    (gzipped if compress==True, as for makeSV).
+    Returns the SV file names (without extension) in the order of scorePaths.
+    '''
+
+    extractOne = partial(_extractOne, svFilePath=svFilePath, delimiter=delimiter,
+                         cacheDir=cacheDir, compress=compress)
+    with ProcessPoolExecutor(max_workers=maxWorkers) as executor:
+        return list(executor.map(extractOne, scorePaths, chunksize=4))
+
 # ------------------------------------------------------------------------------
 
 class Test(unittest.TestCase):
@@ -592,6 +1049,38 @@ class Test(unittest.TestCase):
             pathToDesktop = os.path.expanduser('~') + '/Desktop/'
             info.makeSV(pathToDesktop)
 
+    def test_ScoreInfoSVCache(self):
+
+        try:
+            import pyarrow  # Required for the cache
+        except ImportError:
+            self.skipTest('pyarrow is not installed')
+
+        from music21 import corpus
+        import tempfile
+
+        scorePath = str(corpus.getWork('bach/bwv269'))
+
+        with tempfile.TemporaryDirectory() as tempDir:
+            cacheDir = os.path.join(tempDir, 'cache')
+
+            extracted = ScoreInfoSV(scorePath, cacheDir=cacheDir)  # Extracts and writes the cache
+            self.assertIsNotNone(extracted.score)
+            self.assertEqual(len(os.listdir(cacheDir)), 1)
+
+            cached = ScoreInfoSV(scorePath, cacheDir=cacheDir)  # Reads the cache
+            self.assertIsNone(cached.score)
+            self.assertIsInstance(cached.data[0], TableEntry)
+            self.assertEqual(cached.svFileName, extracted.svFileName)
+
+            extracted.makeSV(tempDir + '/', 'extracted')
+            cached.makeSV(tempDir + '/', 'cached')
+            with open(os.path.join(tempDir, 'extracted.tsv'), 'rb') as f:
+                extractedSV = f.read()
+            with open(os.path.join(tempDir, 'cached.tsv'), 'rb') as f:
+                cachedSV = f.read()
+            self.assertEqual(extractedSV, cachedSV)
+
     def test_SVInfo(self):
 
         svegfile = 'SV-EG-bwv269.tsv'
@@ -625,6 +1114,17 @@ class Test(unittest.TestCase):
         self.assertEqual(allAugs[1], ('[0, 3, 6] Count', 4))
         self.assertEqual(allAugs[2], ('[0, 3, 6] Proportion', 0.05))
 
+        allTriads = info.compareAllPrimes(('triads',))
+        self.assertEqual(allTriads, [('Overall', 80),
+                                     ('[0, 4, 7] Count', 0), ('[0, 4, 7] Proportion', 0.0),
+                                     ('[0, 3, 7] Count', 49), ('[0, 3, 7] Proportion', 0.6125),
+                                     ('[0, 3, 6] Count', 4), ('[0, 3, 6] Proportion', 0.05),
+                                     ('[0, 4, 8] Count', 0), ('[0, 4, 8] Proportion', 0.0)])
+
+        for badOptions in [(), ('sevenths',), ('major', 'sevenths')]:
+            with self.assertRaises(ValueError):
+                info.compareAllPrimes(badOptions)
+
         info.followChord(targetChord = '[0, 3, 6]')
         self.assertEqual(info.followCount, [('[0, 3, 7]', 4)])
 
@@ -633,6 +1133,55 @@ class Test(unittest.TestCase):
         for x in info.evenSliceList:
             self.assertEqual(x.length, 0.5)
 
+        # Explicit slice width over entries shorter than it (triplets, and lengths that sum to just under 1.0)
+        import tempfile
+
+        rows = [(1, 1.0, 1.0, '1.0', "['C4']", 0)] + \
+               [(1, 2.0, 0.5, '0.33', "['D4']", 2)] * 3 + \
+               [(1, 3.0, 0.5, '1.0', "['E4']", 4)] + \
+               [(1, 4.0, 0.5, '0.1', "['F4']", 5)] * 10 + \
+               [(2, 1.0, 1.0, '1.0', "['G4']", 7)]
+
+        with tempfile.TemporaryDirectory() as tempDir:
+            svPath = os.path.join(tempDir, 'short.tsv')
+            with open(svPath, 'w') as f:
+                for measure, beat, beatStrength, length, pitches, pc in rows:
+                    f.write(f'{measure}\t{beat}\t{beatStrength}\t{length}\t{pitches}\t[]\t[0]\t[{pc}]\n')
+            shortInfo = SVInfo(svPath)
+
+        shortInfo.evenSlices(sliceWidth=1.0)
+        self.assertEqual([x.length for x in shortInfo.evenSliceList], [1.0, 0.33, 1.0, 0.1, 1.0])
+        self.assertEqual([x.pitches for x in shortInfo.evenSliceList],
+                         [['C4'], ['D4'], ['E4'], ['F4'], ['G4']])
+
+
+    def test_SVInfoKernels(self):
+
+        # The NumPy kernels and the loops (compiled with numba when SVINFO_NUMBA is set)
+        # should select the same entries and sum their weights identically
+        info = SVInfo("LiederScoreSVs/Debussy,_Claude_-_Cinq_Poëmes_de_Baudelaire_-_3_-_Le_Jet_d'Eau.tsv")
+
+        for weighted in (True, False):
+            weights = info._weights(weighted)
+
+            for prime in info.uniquePrimes:
+                code = info.primeVocab[prime]
+                loopMask, loopCount = _matchCodeLoop(info.primeCodes, code, weights)
+                numPyMask, numPyCount = _matchCodeNumPy(info.primeCodes, code, weights)
+                self.assertTrue(np.array_equal(loopMask, numPyMask))
+                self.assertEqual(loopCount, numPyCount)
+
+            for name, code in info.intervalVocab.items():
+                query = np.zeros(info.intervalMask.shape[1], dtype=np.uint64)
+                query[code // 64] = np.uint64(1) << np.uint64(code % 64)
+                loopMask, loopCount = _matchBitsLoop(info.intervalMask, query, weights)
+                numPyMask, numPyCount = _matchBitsNumPy(info.intervalMask, query, weights)
+                self.assertTrue(np.array_equal(loopMask, numPyMask))
+                self.assertEqual(loopCount, numPyCount)
+
+        self.assertEqual(info.intervalsOfType(['P19'], weighted=True, measures=False), 60.138)
+        self.assertEqual(info.intervalsOfType(['A6', 'd3', 'A13', 'd10'], weighted=True, measures=False), 17.462)
+
 
     def test_getIntervals(self):
 